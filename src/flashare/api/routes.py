@@ -1,200 +1,373 @@
 """API routes for Flashare - Enhanced with parallel processing and batch uploads."""
 
 import os
+import stat
+import shutil
+import time
 import asyncio
 from pathlib import Path
 from typing import Optional, List
-from concurrent.futures import ThreadPoolExecutor
-import functools
+from functools import lru_cache
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks
-from fastapi.responses import StreamingResponse, HTMLResponse, Response
-import aiofiles
+from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse, HTMLResponse, Response, FileResponse, JSONResponse
+import orjson
 
 from flashare.config import config
-from flashare.core.compression import generate_compressed_stream
+from flashare.core.compression import (
+    generate_compressed_stream,
+    get_dictionary,
+    should_compress,
+    uses_dictionary,
+)
 from flashare.core.qr import get_qr_data, generate_qr_png_bytes
 from flashare.core.network import get_server_url
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
 
 router = APIRouter()
 
-# Thread pool for CPU-bound operations
-executor = ThreadPoolExecutor(max_workers=4)
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    
+    Handlers return it directly: FastAPI only runs jsonable_encoder on
+    plain return values, so this skips that pass over every response.
+    """
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+class DownloadFileResponse(FileResponse):
+    """
+    FileResponse that streams in config.chunk_size blocks.
+    
+    Servers implementing the ASGI pathsend extension hand the whole file to
+    the kernel (sendfile) and never use the chunk size. uvicorn does not,
+    so Starlette reads the file itself with one thread hop per chunk; 1MB
+    blocks instead of the default 64KB cut those hops 16-fold.
+    """
+    
+    chunk_size = config.chunk_size
+
+
+# Bound batch fan-out so large batches don't thrash the disk
+_UPLOAD_SEM = asyncio.Semaphore(config.max_concurrent_uploads)
+_DELETE_SEM = asyncio.Semaphore(config.max_concurrent_uploads)
 
 
 # ==================== Utility Functions (Lambda-style) ====================
 
-format_size = lambda size_bytes: (
-    f"{size_bytes:.1f} B" if size_bytes < 1024 else
-    f"{size_bytes/1024:.1f} KB" if size_bytes < 1024**2 else
-    f"{size_bytes/1024**2:.1f} MB" if size_bytes < 1024**3 else
-    f"{size_bytes/1024**3:.1f} GB"
-)
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+_SIZE_DIVISORS = tuple(1 << (10 * i) for i in range(len(_SIZE_UNITS)))
+
 
-get_file_extension = lambda filename: Path(filename).suffix.lower()[1:] if Path(filename).suffix else ""
+def format_size(size_bytes: int) -> str:
+    """Format bytes as a human-readable size, picking the unit by bit length."""
+    i = min(max((size_bytes.bit_length() - 1) // 10, 0), len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / _SIZE_DIVISORS[i]:.1f} {_SIZE_UNITS[i]}"
 
-is_image = lambda filename: get_file_extension(filename) in {"jpg", "jpeg", "png", "gif", "webp", "svg", "heic", "bmp"}
-is_video = lambda filename: get_file_extension(filename) in {"mp4", "mov", "avi", "mkv", "webm", "m4v"}
-is_audio = lambda filename: get_file_extension(filename) in {"mp3", "wav", "flac", "aac", "ogg", "m4a"}
-is_document = lambda filename: get_file_extension(filename) in {"pdf", "doc", "docx", "txt", "rtf", "md", "xls", "xlsx", "csv"}
+
+_EXT_TO_TYPE = {
+    **dict.fromkeys(("jpg", "jpeg", "png", "gif", "webp", "svg", "heic", "bmp"), "image"),
+    **dict.fromkeys(("mp4", "mov", "avi", "mkv", "webm", "m4v"), "video"),
+    **dict.fromkeys(("mp3", "wav", "flac", "aac", "ogg", "m4a"), "audio"),
+    **dict.fromkeys(("pdf", "doc", "docx", "txt", "rtf", "md", "xls", "xlsx", "csv"), "document"),
+}
 
 
 def get_file_type(filename: str) -> str:
-    """Categorize file by type using lambda predicates."""
-    predicates = [
-        (is_image, "image"),
-        (is_video, "video"),
-        (is_audio, "audio"),
-        (is_document, "document"),
-    ]
-    return next((category for predicate, category in predicates if predicate(filename)), "file")
+    """Categorize file by type using a precomputed extension lookup."""
+    stem, dot, ext = filename.rpartition(".")
+    # Match Path.suffix: dotfiles like ".bashrc" have no extension
+    if not dot or not stem:
+        return "file"
+    return _EXT_TO_TYPE.get(ext.lower(), "file")
 
 
 async def run_in_executor(func, *args):
-    """Run blocking function in thread pool executor."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, functools.partial(func, *args))
+    """Run blocking function in the loop's default thread pool executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
 
 
 # ==================== File Operations ====================
 
+@lru_cache(maxsize=1)
+def _uploads_root() -> Path:
+    """Resolve the uploads directory once per process."""
+    return config.uploads_dir.resolve()
+
+
+def _safe_upload_path(filename: str) -> Optional[Path]:
+    """
+    Resolve a filename inside the uploads directory.
+    
+    Returns:
+        The resolved path, or None if it escapes the uploads directory.
+    """
+    root = _uploads_root()
+    target = (root / filename).resolve(strict=False)
+    try:
+        if os.path.commonpath([root, target]) != str(root):
+            return None
+    except ValueError:
+        # Windows: an absolute name on another drive shares no common path
+        return None
+    return target
+
+
+def _create_unique_file(filename: str) -> tuple[int, Path]:
+    """
+    Atomically create a new file in the uploads directory.
+    
+    Handles duplicate filenames: O_EXCL makes the kernel reject taken
+    names atomically, so parallel uploads can't claim the same one.
+    
+    Returns:
+        The open file descriptor and the path that was created.
+    """
+    file_path = config.uploads_dir / filename
+    counter = 1
+    original_stem = file_path.stem
+    while True:
+        try:
+            return os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644), file_path
+        except FileExistsError:
+            file_path = config.uploads_dir / f"{original_stem}_{counter}{file_path.suffix}"
+            counter += 1
+
+
+def _upload_result(file_path: Path, size: int) -> dict:
+    """Build the result dictionary for a successfully saved upload."""
+    return {
+        "success": True,
+        "filename": file_path.name,
+        "size": size,
+        "size_human": format_size(size),
+        "type": get_file_type(file_path.name),
+    }
+
+
+def _batch_summary(results: List[dict]) -> dict:
+    """Build the batch upload response with a summary of the results."""
+    # Compute summary using filter lambdas
+    successful = list(filter(lambda r: r["success"], results))
+    failed = list(filter(lambda r: not r["success"], results))
+    
+    total_size = sum(map(lambda r: r.get("size", 0), successful))
+    
+    return {
+        "success": len(failed) == 0,
+        "files": results,
+        "summary": {
+            "total": len(results),
+            "successful": len(successful),
+            "failed": len(failed),
+            "total_size": total_size,
+            "total_size_human": format_size(total_size),
+        }
+    }
+
+
 async def _save_uploaded_file(file: UploadFile) -> dict:
     """
     Save an uploaded file and return result.
     
-    Uses efficient chunked writing for large files.
+    The whole copy runs in one executor call rather than one event loop
+    round-trip per chunk.
     """
     if not file.filename:
         return {"success": False, "error": "No filename provided"}
     
     # Sanitize filename
     safe_filename = Path(file.filename).name
-    file_path = config.uploads_dir / safe_filename
-    
-    # Handle duplicate filenames
-    counter = 1
-    original_stem = file_path.stem
-    while file_path.exists():
-        file_path = config.uploads_dir / f"{original_stem}_{counter}{file_path.suffix}"
-        counter += 1
     
     try:
-        # Save the file with async I/O
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(config.chunk_size):
-                await f.write(chunk)
+        fd, file_path = _create_unique_file(safe_filename)
         
-        stat = file_path.stat()
-        return {
-            "success": True,
-            "filename": file_path.name,
-            "size": stat.st_size,
-            "size_human": format_size(stat.st_size),
-            "type": get_file_type(file_path.name),
-        }
+        # The request body is already spooled, so it is safe to read from a worker thread
+        dst = open(fd, 'wb', buffering=config.chunk_size)
+        try:
+            await run_in_executor(shutil.copyfileobj, file.file, dst, config.chunk_size)
+            dst.flush()
+            # fstat the open descriptor rather than stat-ing the path again
+            size = os.fstat(dst.fileno()).st_size
+        finally:
+            dst.close()
+            _invalidate_snapshot()
+        
+        return _upload_result(file_path, size)
     except Exception as e:
         return {"success": False, "error": str(e), "filename": safe_filename}
 
 
-async def _get_file_info(file_path: Path) -> dict:
-    """Get file info dictionary - async-optimized."""
-    stat = await run_in_executor(file_path.stat)
-    return {
-        "name": file_path.name,
-        "size": stat.st_size,
-        "size_human": format_size(stat.st_size),
-        "modified": stat.st_mtime,
-        "type": get_file_type(file_path.name),
-    }
+def _scan_uploads() -> list[tuple[str, os.stat_result]]:
+    """
+    Scan the uploads directory in a single pass.
+    
+    DirEntry carries the file type from readdir, so only one stat
+    call is made per visible file. The directory is created at startup,
+    so a missing one (removed at runtime) is treated as empty.
+    """
+    try:
+        with os.scandir(config.uploads_dir) as entries:
+            return [
+                (entry.name, entry.stat())
+                for entry in entries
+                if entry.is_file(follow_symlinks=False) and not entry.name.startswith('.')
+            ]
+    except FileNotFoundError:
+        return []
+
+
+# Short-lived directory snapshot shared by list_files and get_status, so
+# clients polling both endpoints trigger one scan instead of two
+SNAPSHOT_TTL = 1.0
+_snapshot: Optional[tuple[int, float, list]] = None
+_snapshot_generation = 0
+_snapshot_lock = asyncio.Lock()
+
+
+def _invalidate_snapshot():
+    """Drop the cached directory snapshot after the uploads directory changes."""
+    global _snapshot_generation
+    _snapshot_generation += 1
+
+
+async def _dir_snapshot() -> list[tuple[str, os.stat_result]]:
+    """
+    Get the uploads directory listing, rescanning at most once per SNAPSHOT_TTL.
+    
+    Uploads and deletes made through the API invalidate it immediately.
+    """
+    global _snapshot
+    
+    async with _snapshot_lock:
+        generation = _snapshot_generation
+        if (
+            _snapshot is None
+            or _snapshot[0] != generation
+            or time.monotonic() - _snapshot[1] > SNAPSHOT_TTL
+        ):
+            entries = await run_in_executor(_scan_uploads)
+            _snapshot = (generation, time.monotonic(), entries)
+        return _snapshot[2]
 
 
 # ==================== API Endpoints ====================
 
-@router.get("/api/files")
+@router.get("/api/files", response_class=ORJSONResponse)
 async def list_files():
     """
     List all available files in the uploads directory.
     
-    Uses parallel processing for faster file stat operations.
+    The directory is scanned in one executor call instead of one per file,
+    and the scan is shared with get_status for SNAPSHOT_TTL seconds.
     
     Returns:
         List of file information dictionaries sorted by modification time.
     """
-    if not config.uploads_dir.exists():
-        return []
-    
-    # Get list of file paths
-    file_paths = [
-        f for f in config.uploads_dir.iterdir() 
-        if f.is_file() and not f.name.startswith('.')
+    entries = await _dir_snapshot()
+    
+    files = [
+        {
+            "name": name,
+            "size": st.st_size,
+            "size_human": format_size(st.st_size),
+            "modified": st.st_mtime,
+            "type": get_file_type(name),
+        }
+        for name, st in entries
     ]
     
-    if not file_paths:
-        return []
-    
-    # Process files in parallel using asyncio.gather
-    tasks = [_get_file_info(fp) for fp in file_paths]
-    files = await asyncio.gather(*tasks)
-    
     # Sort by modification time (newest first) using lambda
     files_sorted = sorted(files, key=lambda x: x["modified"], reverse=True)
     
-    return files_sorted
+    return ORJSONResponse(files_sorted)
 
 
 @router.get("/api/download/{filename}")
-async def download_file(filename: str, compressed: bool = True):
+async def download_file(filename: str, compressed: bool = True, dictionary: bool = False):
     """
     Download a file with optional Zstandard compression.
     
     Args:
         filename: Name of the file to download.
         compressed: Whether to use Zstd compression (default: True).
+            Already-compressed formats are always sent as-is.
+        dictionary: Compress small text files with the trained dictionary served
+            at /api/zstd-dictionary. The client must have fetched it.
         
     Returns:
         StreamingResponse with the file content.
     """
-    file_path = config.uploads_dir / filename
+    # Security: ensure the path is within uploads directory
+    file_path = _safe_upload_path(filename)
+    if file_path is None:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    if not file_path.exists():
+    # One stat serves the existence check, the type check and the size
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
-    if not file_path.is_file():
+    if not stat.S_ISREG(file_stat.st_mode):
         raise HTTPException(status_code=400, detail="Not a file")
     
-    # Security: ensure the path is within uploads directory
-    try:
-        file_path.resolve().relative_to(config.uploads_dir.resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    if compressed:
+    if compressed and should_compress(file_path):
+        headers = {
+            "Content-Encoding": "zstd",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        }
+        
+        dict_data = None
+        if dictionary and uses_dictionary(file_path, file_stat.st_size):
+            dict_data = get_dictionary()
+        if dict_data is not None:
+            headers["X-Zstd-Dictionary-Id"] = str(dict_data.dict_id())
+        
         return StreamingResponse(
-            generate_compressed_stream(file_path),
+            generate_compressed_stream(file_path, dict_data=dict_data, size=file_stat.st_size),
             media_type="application/octet-stream",
-            headers={
-                "Content-Encoding": "zstd",
-                "Content-Disposition": f'attachment; filename="{filename}"',
-            }
+            headers=headers,
         )
     else:
-        async def file_iterator():
-            async with aiofiles.open(file_path, 'rb') as f:
-                while chunk := await f.read(config.chunk_size):
-                    yield chunk
-        
-        return StreamingResponse(
-            file_iterator(),
+        # Sent as-is; zero-copy (pathsend) where the ASGI server supports it
+        return DownloadFileResponse(
+            path=file_path,
+            filename=filename,
             media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(file_path.stat().st_size),
-            }
+            stat_result=file_stat,
         )
 
 
-@router.post("/api/upload")
+@router.get("/api/zstd-dictionary")
+async def get_zstd_dictionary():
+    """
+    Get the trained Zstandard dictionary used for small-file downloads.
+    
+    Returns:
+        Raw dictionary bytes.
+    """
+    dict_data = get_dictionary()
+    if dict_data is None:
+        raise HTTPException(status_code=404, detail="No dictionary available")
+    
+    return Response(
+        content=dict_data.as_bytes(),
+        media_type="application/octet-stream",
+        headers={"X-Zstd-Dictionary-Id": str(dict_data.dict_id())},
+    )
+
+
+@router.post("/api/upload", response_class=ORJSONResponse)
 async def upload_file(file: UploadFile = File(...)):
     """
     Upload a single file from the phone to the laptop.
@@ -210,15 +383,16 @@ async def upload_file(file: UploadFile = File(...)):
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Upload failed"))
     
-    return result
+    return ORJSONResponse(result)
 
 
-@router.post("/api/upload-multiple")
+@router.post("/api/upload-multiple", response_class=ORJSONResponse)
 async def upload_multiple_files(files: List[UploadFile] = File(...)):
     """
     Upload multiple files simultaneously with parallel processing.
     
-    Uses asyncio.gather for concurrent file saving operations.
+    Uses asyncio.gather for concurrent file saving operations, bounded
+    by config.max_concurrent_uploads.
     
     Args:
         files: List of files to upload.
@@ -229,38 +403,130 @@ async def upload_multiple_files(files: List[UploadFile] = File(...)):
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     
+    async def save_guarded(file: UploadFile) -> dict:
+        async with _UPLOAD_SEM:
+            return await _save_uploaded_file(file)
+    
     # Process all files in parallel
-    tasks = [_save_uploaded_file(file) for file in files]
+    tasks = [save_guarded(file) for file in files]
     results = await asyncio.gather(*tasks)
     
-    # Compute summary using filter lambdas
-    successful = list(filter(lambda r: r["success"], results))
-    failed = list(filter(lambda r: not r["success"], results))
+    return ORJSONResponse(_batch_summary(results))
+
+
+@router.post("/api/upload-stream", response_class=ORJSONResponse)
+async def upload_stream(request: Request):
+    """
+    Upload files by streaming the multipart body straight to disk.
     
-    total_size = sum(map(lambda r: r.get("size", 0), successful))
+    Unlike /api/upload-multiple, the body is never spooled to a temporary
+    file first, so each byte is written once and peak memory stays at one
+    network read.
     
-    return {
-        "success": len(failed) == 0,
-        "files": results,
-        "summary": {
-            "total": len(results),
-            "successful": len(successful),
-            "failed": len(failed),
-            "total_size": total_size,
-            "total_size_human": format_size(total_size),
-        }
-    }
+    Returns:
+        Batch upload results with summary.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+    
+    results: List[dict] = []
+    part: dict = {}
+    
+    def on_part_begin():
+        part.clear()
+        part["headers"] = {}
+    
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] = part.get("field", b"") + data[start:end]
+    
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] = part.get("value", b"") + data[start:end]
+    
+    def on_header_end():
+        part["headers"][part.pop("field", b"").lower()] = part.pop("value", b"")
+    
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        if filename is None:
+            return  # Plain form field, not a file
+        
+        # Sanitize filename
+        safe_filename = Path(filename.decode("utf-8", "replace")).name
+        if not safe_filename:
+            results.append({"success": False, "error": "No filename provided"})
+            return
+        
+        try:
+            fd, file_path = _create_unique_file(safe_filename)
+        except OSError as e:
+            results.append({"success": False, "error": str(e), "filename": safe_filename})
+            return
+        
+        part.update(file=open(fd, 'wb', buffering=config.chunk_size), path=file_path, size=0)
+    
+    def on_part_data(data: bytes, start: int, end: int):
+        if "file" in part:
+            part["file"].write(data[start:end])
+            part["size"] += end - start
+    
+    def on_part_end():
+        if "file" in part:
+            part.pop("file").close()
+            results.append(_upload_result(part["path"], part["size"]))
+    
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    
+    def discard_partial():
+        part.pop("file").close()
+        part["path"].unlink(missing_ok=True)
+    
+    # The parser callbacks create, write and close files, so each network
+    # chunk is parsed in the executor; awaiting each call keeps them in order
+    error = None
+    try:
+        async for chunk in request.stream():
+            await run_in_executor(parser.write, chunk)
+        await run_in_executor(parser.finalize)
+    except Exception as e:
+        error = str(e)
+    
+    # A part still open here was truncated; don't leave a partial file behind
+    if "file" in part:
+        await run_in_executor(discard_partial)
+        results.append({"success": False, "error": error or "Upload incomplete", "filename": part["path"].name})
+    elif error:
+        results.append({"success": False, "error": error})
+    
+    _invalidate_snapshot()
+    
+    if not results:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    return ORJSONResponse(_batch_summary(results))
 
 
-@router.get("/api/qr")
+@router.get("/api/qr", response_class=ORJSONResponse)
 async def get_qr():
     """
     Get QR code data for connecting to the server.
     
+    The QR encodings are cached per server URL in flashare.core.qr.
+    
     Returns:
         QR code information including URL and encodings.
     """
-    return get_qr_data(config.port)
+    return ORJSONResponse(await run_in_executor(get_qr_data, config.port))
 
 
 @router.get("/api/qr.png")
@@ -268,16 +534,17 @@ async def get_qr_image():
     """
     Get QR code as PNG image.
     
-    Runs PNG generation in executor to avoid blocking.
+    Runs PNG generation in executor to avoid blocking; the bytes are
+    cached per server URL in flashare.core.qr.
     
     Returns:
         PNG image of the QR code.
     """
-    png_bytes = await run_in_executor(generate_qr_png_bytes, config.port)
+    png_bytes = await run_in_executor(generate_qr_png_bytes, None, config.port)
     return Response(content=png_bytes, media_type="image/png")
 
 
-@router.get("/api/status")
+@router.get("/api/status", response_class=ORJSONResponse)
 async def get_status():
     """
     Get server status and information.
@@ -285,20 +552,20 @@ async def get_status():
     Returns:
         Server status information including file count and storage stats.
     """
-    files = list(config.uploads_dir.glob("*")) if config.uploads_dir.exists() else []
-    total_size = sum(f.stat().st_size for f in files if f.is_file())
+    entries = await _dir_snapshot()
+    total_size = sum(st.st_size for _, st in entries)
     
-    return {
+    return ORJSONResponse({
         "status": "online",
         "url": get_server_url(config.port),
         "uploads_dir": str(config.uploads_dir),
-        "file_count": len(files),
+        "file_count": len(entries),
         "total_size": total_size,
         "total_size_human": format_size(total_size),
-    }
+    })
 
 
-@router.delete("/api/files/{filename}")
+@router.delete("/api/files/{filename}", response_class=ORJSONResponse)
 async def delete_file(filename: str):
     """
     Delete a file from the uploads directory.
@@ -309,29 +576,28 @@ async def delete_file(filename: str):
     Returns:
         Deletion result.
     """
-    file_path = config.uploads_dir / filename
+    # Security check
+    file_path = _safe_upload_path(filename)
+    if file_path is None:
+        raise HTTPException(status_code=403, detail="Access denied")
     
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Security check
-    try:
-        file_path.resolve().relative_to(config.uploads_dir.resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     # Use executor for file deletion (blocking I/O)
     await run_in_executor(file_path.unlink)
+    _invalidate_snapshot()
     
-    return {"success": True, "deleted": filename}
+    return ORJSONResponse({"success": True, "deleted": filename})
 
 
-@router.delete("/api/files")
+@router.delete("/api/files", response_class=ORJSONResponse)
 async def delete_multiple_files(filenames: List[str]):
     """
     Delete multiple files from the uploads directory.
     
-    Uses parallel processing for batch deletions.
+    Uses parallel processing for batch deletions, bounded by
+    config.max_concurrent_uploads.
     
     Args:
         filenames: List of filenames to delete.
@@ -340,18 +606,17 @@ async def delete_multiple_files(filenames: List[str]):
         Batch deletion results.
     """
     async def delete_single(filename: str) -> dict:
-        file_path = config.uploads_dir / filename
+        file_path = _safe_upload_path(filename)
+        if file_path is None:
+            return {"filename": filename, "success": False, "error": "Access denied"}
         
         if not file_path.exists():
             return {"filename": filename, "success": False, "error": "File not found"}
         
         try:
-            file_path.resolve().relative_to(config.uploads_dir.resolve())
-        except ValueError:
-            return {"filename": filename, "success": False, "error": "Access denied"}
-        
-        try:
-            await run_in_executor(file_path.unlink)
+            async with _DELETE_SEM:
+                await run_in_executor(file_path.unlink)
+            _invalidate_snapshot()
             return {"filename": filename, "success": True}
         except Exception as e:
             return {"filename": filename, "success": False, "error": str(e)}
@@ -362,7 +627,7 @@ async def delete_multiple_files(filenames: List[str]):
     
     successful = len(list(filter(lambda r: r["success"], results)))
     
-    return {
+    return ORJSONResponse({
         "success": successful == len(filenames),
         "results": results,
         "summary": {
@@ -370,4 +635,4 @@ async def delete_multiple_files(filenames: List[str]):
             "successful": successful,
             "failed": len(filenames) - successful,
         }
-    }
+    })
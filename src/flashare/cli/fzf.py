@@ -3,13 +3,32 @@
 import os
 import subprocess
 import shutil
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TextIO
+
+
+# Directories never offered for selection
+EXCLUDED_DIRS = frozenset({"__pycache__", "node_modules", ".git"})
+
+
+@lru_cache(maxsize=1)
+def find_fzf() -> Optional[str]:
+    """
+    Locate the fzf binary, once per process.
+    
+    FLASHARE_FZF, when set, is used as-is and skips the PATH search.
+    
+    Returns:
+        Path to fzf, or None if not found.
+    """
+    return os.environ.get("FLASHARE_FZF") or shutil.which("fzf")
 
 
 def is_fzf_available() -> bool:
     """Check if fzf is available on the system."""
-    return shutil.which("fzf") is not None
+    return find_fzf() is not None
 
 
 def select_file(
@@ -33,17 +52,6 @@ def select_file(
     
     start_dir = start_dir or Path.cwd()
     
-    # Build the find command
-    # Exclude hidden files and common unwanted directories
-    find_cmd = (
-        f'find "{start_dir}" -type f '
-        '-not -path "*/.*" '
-        '-not -path "*/__pycache__/*" '
-        '-not -path "*/node_modules/*" '
-        '-not -path "*/.git/*" '
-        '2>/dev/null'
-    )
-    
     # Build fzf command
     fzf_opts = [
         "--prompt", prompt,
@@ -58,33 +66,10 @@ def select_file(
         preview_cmd = "head -50 {}" if not shutil.which("bat") else "bat --color=always --style=plain --line-range=:50 {}"
         fzf_opts.extend(["--preview", preview_cmd])
     
-    fzf_cmd = ["fzf"] + fzf_opts
+    stdout = _run_fzf(start_dir, fzf_opts)
     
-    try:
-        # Pipe find output to fzf
-        find_proc = subprocess.Popen(
-            find_cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-        )
-        
-        fzf_proc = subprocess.Popen(
-            fzf_cmd,
-            stdin=find_proc.stdout,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        )
-        
-        stdout, _ = fzf_proc.communicate()
-        find_proc.wait()
-        
-        if fzf_proc.returncode == 0 and stdout.strip():
-            return Path(stdout.strip())
-        
-    except Exception:
-        pass
+    if stdout:
+        return Path(stdout)
     
     return None
 
@@ -111,15 +96,6 @@ def select_multiple_files(
     
     start_dir = start_dir or Path.cwd()
     
-    find_cmd = (
-        f'find "{start_dir}" -type f '
-        '-not -path "*/.*" '
-        '-not -path "*/__pycache__/*" '
-        '-not -path "*/node_modules/*" '
-        '-not -path "*/.git/*" '
-        '2>/dev/null'
-    )
-    
     fzf_opts = [
         "--prompt", prompt,
         "--multi",  # Enable multi-select
@@ -133,34 +109,81 @@ def select_multiple_files(
         preview_cmd = "head -50 {}" if not shutil.which("bat") else "bat --color=always --style=plain --line-range=:50 {}"
         fzf_opts.extend(["--preview", preview_cmd])
     
-    fzf_cmd = ["fzf"] + fzf_opts
+    stdout = _run_fzf(start_dir, fzf_opts)
     
+    if stdout:
+        return [Path(line) for line in stdout.split('\n') if line]
+    
+    return []
+
+
+def _write_candidates(start_dir: Path, stream: TextIO) -> None:
+    """
+    Walk start_dir and write candidate file paths to stream.
+    
+    Skips hidden files and directories, plus common unwanted directories.
+    
+    Args:
+        start_dir: Directory to walk.
+        stream: Writable text stream (fzf's stdin).
+    """
     try:
-        find_proc = subprocess.Popen(
-            find_cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-        )
+        for root, dirs, files in os.walk(start_dir):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith(".")]
+            for name in files:
+                if not name.startswith("."):
+                    stream.write(os.path.join(root, name) + "\n")
+    except (BrokenPipeError, ValueError):
+        # fzf exited before the walk finished
+        pass
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+
+def _run_fzf(start_dir: Path, fzf_opts: list[str]) -> Optional[str]:
+    """
+    Run fzf over the files under start_dir.
+    
+    Candidates are streamed to fzf's stdin from a background thread, so
+    no shell or find process is spawned.
+    
+    Args:
+        start_dir: Directory to list files from.
+        fzf_opts: Command-line options for fzf.
         
+    Returns:
+        fzf's stripped output, or None if cancelled.
+    """
+    try:
         fzf_proc = subprocess.Popen(
-            fzf_cmd,
-            stdin=find_proc.stdout,
+            [find_fzf()] + fzf_opts,
+            stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
             text=True,
         )
         
-        stdout, _ = fzf_proc.communicate()
-        find_proc.wait()
+        writer = threading.Thread(
+            target=_write_candidates,
+            args=(start_dir, fzf_proc.stdin),
+            daemon=True,
+        )
+        writer.start()
+        
+        stdout = fzf_proc.stdout.read()
+        fzf_proc.wait()
+        writer.join()
         
         if fzf_proc.returncode == 0 and stdout.strip():
-            return [Path(line) for line in stdout.strip().split('\n') if line]
+            return stdout.strip()
         
     except Exception:
         pass
     
-    return []
+    return None
 
 
 def _fallback_select(start_dir: Optional[Path] = None) -> Optional[Path]:
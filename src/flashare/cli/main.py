@@ -1,33 +1,27 @@
-"""Main CLI entry point for Flashare."""
+"""
+Main CLI entry point for Flashare.
+
+Only the version metadata is imported at module scope. Config is imported
+once arguments are parsed (or when help is rendered), and the Rich, fzf and
+ffmpeg helpers only once a command needs them, so `flashare --version` and
+`--help` never load Rich.
+"""
 
 import argparse
-import shutil
+import os
 import sys
 from pathlib import Path
 
 from flashare import __version__, __app_name__
-from flashare.config import config
-from flashare.cli.fzf import select_multiple_files, is_fzf_available
-from flashare.cli.ui import (
-    console,
-    print_banner,
-    print_qr_code,
-    print_server_info,
-    print_file_ready,
-    print_optimization_result,
-    print_error,
-    print_warning,
-    print_success,
-    print_info,
-    confirm,
-    create_progress,
-)
-from flashare.core.ffmpeg import is_video_file, optimize_video, is_ffmpeg_available
-from flashare.core.network import get_server_url
 
 
 def main():
     """Main entry point for the flashare command."""
+    # Fast path: answer version queries before building any parser
+    if sys.argv[1:] in (["version"], ["-v"], ["--version"]):
+        print(f"{__app_name__} {__version__}")
+        return
+    
     parser = argparse.ArgumentParser(
         prog="flashare",
         description=f"{__app_name__} - CLI-First Hybrid File Sharing Tool",
@@ -41,52 +35,13 @@ def main():
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
-    # Send command
-    send_parser = subparsers.add_parser("send", help="Send files or folders")
-    send_parser.add_argument(
-        "files",
-        nargs="*",
-        help="Files to share (opens fzf selector if not provided)",
-    )
-    send_parser.add_argument(
-        "-p", "--port",
-        type=int,
-        default=config.port,
-        help=f"Server port (default: {config.port})",
-    )
-    send_parser.add_argument(
-        "-H", "--host",
-        default=config.host,
-        help=f"Server host (default: {config.host})",
-    )
-    send_parser.add_argument(
-        "--no-optimize",
-        action="store_true",
-        help="Skip video optimization even for video files",
-    )
-    send_parser.add_argument(
-        "-d", "--directory",
-        type=Path,
-        default=Path.cwd(),
-        help="Starting directory for file selection",
-    )
-    
-    # Receive command
-    receive_parser = subparsers.add_parser("receive", help="Receive files (starts server)")
-    receive_parser.add_argument(
-        "-p", "--port",
-        type=int,
-        default=config.port,
-        help=f"Server port (default: {config.port})",
-    )
-    receive_parser.add_argument(
-        "-H", "--host",
-        default=config.host,
-        help=f"Server host (default: {config.host})",
-    )
-    
-    # Version command
-    subparsers.add_parser("version", help="Show version information")
+    # Only build the subparser being invoked; build all of them when no known
+    # command is given so that help and error messages list every choice
+    argv = sys.argv[1:]
+    requested = argv[0] if argv and argv[0] in _SUBPARSERS else None
+    for name, add_subparser in _SUBPARSERS.items():
+        if requested is None or name == requested:
+            add_subparser(subparsers)
     
     args = parser.parse_args()
     
@@ -95,6 +50,30 @@ def main():
         print(f"{__app_name__} {__version__}")
         return
     
+    from flashare.config import config
+    
+    from flashare.cli.fzf import select_multiple_files, is_fzf_available
+    from flashare.cli.ui import (
+        console,
+        print_banner,
+        print_file_ready,
+        print_optimization_result,
+        print_error,
+        print_warning,
+        print_info,
+        confirm,
+        create_progress,
+    )
+    from flashare.core.ffmpeg import (
+        is_video_file,
+        optimize_video,
+        is_ffmpeg_available,
+        max_concurrent_encodes,
+    )
+    from flashare.core.staging import stage_file
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    
     # Default to 'send' if no command provided
     if not args.command:
         # Re-parse or manually set defaults for 'send'
@@ -107,12 +86,12 @@ def main():
         directory = Path.cwd()
     else:
         command = args.command
-        port = args.port
-        host = args.host
+        port = config.port if args.port is None else args.port
+        host = config.host if args.host is None else args.host
         if command == "send":
             files_to_share = args.files
             no_optimize = args.no_optimize
-            directory = args.directory
+            directory = args.directory or Path.cwd()
     
     # Update config with CLI arguments
     config.port = port
@@ -153,55 +132,186 @@ def main():
             _start_server(host, port)
             return
     
-    # Process each file
-    for file_path in file_paths:
-        console.print()
+    # Names already taken in the uploads directory, read once for all files
+    uploads_root = config.ensure_uploads_dir().resolve()
+    with os.scandir(uploads_root) as entries:
+        taken = {entry.name for entry in entries}
+    taken_lock = threading.Lock()
+    
+    # Ask every question up front so prompts never interleave with the
+    # workers' output
+    can_optimize = not no_optimize and is_ffmpeg_available()
+    to_optimize = {
+        file_path for file_path in file_paths
+        if can_optimize
+        and is_video_file(file_path)
+        and confirm(f"Optimize {file_path.name} for faster transfer?")
+    }
+    
+    # The worker pool sizes staging; encodes get their own, CPU-aware limit
+    encode_slots = threading.BoundedSemaphore(max_concurrent_encodes() if to_optimize else 1)
+    
+    def process_file(file_path: Path) -> Path:
+        """Optimize (if requested) and stage one file, returning its staged path."""
         print_info(f"Processing: [cyan]{file_path.name}[/]")
         
         final_path = file_path
         
-        # Check if video and offer optimization
-        if is_video_file(file_path) and not no_optimize and is_ffmpeg_available():
-            if confirm(f"Optimize {file_path.name} for faster transfer?"):
-                with create_progress() as progress:
-                    task = progress.add_task(f"Optimizing {file_path.name}...", total=None)
-                    
-                    result = optimize_video(file_path)
-                    
-                    progress.update(task, completed=100)
-                
-                if result.success and result.output_path:
-                    print_optimization_result(
-                        file_path.name,
-                        result.output_path.name,
-                        result.input_size,
-                        result.output_size or 0,
-                    )
-                    final_path = result.output_path
-                else:
-                    print_error(f"Optimization failed: {result.error}")
-                    print_info("Using original file instead.")
+        if file_path in to_optimize:
+            task = progress.add_task(f"Optimizing {file_path.name}...", total=None)
+            
+            # The spinner becomes a percentage bar once FFmpeg reports progress
+            with encode_slots:
+                result = optimize_video(
+                    file_path,
+                    on_progress=lambda pct: progress.update(task, total=100, completed=pct),
+                )
+            
+            progress.update(task, total=100, completed=100)
+            
+            if result.success and result.output_path:
+                print_optimization_result(
+                    file_path.name,
+                    result.output_path.name,
+                    result.input_size,
+                    result.output_size or 0,
+                )
+                final_path = result.output_path
+            else:
+                print_error(f"Optimization failed: {result.error}")
+                print_info("Using original file instead.")
         
-        # Copy to uploads directory
-        dest_path = config.uploads_dir / final_path.name
+        # Already in the uploads directory (e.g. optimized in place)
+        if final_path.resolve().parent == uploads_root:
+            print_file_ready(final_path.name, final_path.stat().st_size)
+            return final_path
         
-        # Handle duplicates
+        # Handle duplicates; the name is reserved before staging so that
+        # concurrent workers never pick the same one, and files that
+        # appeared since the scan (FileExistsError) move on to the next name
         counter = 1
-        original_stem = dest_path.stem
-        while dest_path.exists():
-            dest_path = config.uploads_dir / f"{original_stem}_{counter}{dest_path.suffix}"
-            counter += 1
+        while True:
+            with taken_lock:
+                dest_name = final_path.name
+                while dest_name in taken:
+                    dest_name = f"{final_path.stem}_{counter}{final_path.suffix}"
+                    counter += 1
+                taken.add(dest_name)
+            
+            # Stage into uploads directory (hard link or clone when possible)
+            dest_path = config.uploads_dir / dest_name
+            try:
+                stage_file(final_path, dest_path)
+                break
+            except FileExistsError:
+                continue
         
-        shutil.copy2(final_path, dest_path)
         print_file_ready(dest_path.name, dest_path.stat().st_size)
+        return dest_path
+    
+    # Files are independent, so optimize and stage them concurrently
+    console.print()
+    with create_progress() as progress:
+        with ThreadPoolExecutor(max_workers=min(4, len(file_paths))) as pool:
+            # Consuming the results re-raises any worker exception here
+            list(pool.map(process_file, file_paths))
     
     # Start server
     _start_server(host, port)
 
 
+# Options whose defaults come from config; left as None at parse time
+_CONFIG_DEFAULTS = frozenset({"port", "host"})
+
+
+class _ConfigDefaultsHelpFormatter(argparse.HelpFormatter):
+    """Help formatter that reads option defaults from config only when help is shown."""
+    
+    def _get_help_string(self, action):
+        help_text = action.help
+        if action.default is None and action.dest in _CONFIG_DEFAULTS:
+            from flashare.config import config
+            help_text += f" (default: {getattr(config, action.dest)})"
+        return help_text
+
+
+def _add_send_parser(subparsers):
+    """Register the send command."""
+    send_parser = subparsers.add_parser(
+        "send",
+        help="Send files or folders",
+        formatter_class=_ConfigDefaultsHelpFormatter,
+    )
+    send_parser.add_argument(
+        "files",
+        nargs="*",
+        help="Files to share (opens fzf selector if not provided)",
+    )
+    send_parser.add_argument(
+        "-p", "--port",
+        type=int,
+        help="Server port",
+    )
+    send_parser.add_argument(
+        "-H", "--host",
+        help="Server host",
+    )
+    send_parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Skip video optimization even for video files",
+    )
+    send_parser.add_argument(
+        "-d", "--directory",
+        type=Path,
+        help="Starting directory for file selection (default: current directory)",
+    )
+
+
+def _add_receive_parser(subparsers):
+    """Register the receive command."""
+    receive_parser = subparsers.add_parser(
+        "receive",
+        help="Receive files (starts server)",
+        formatter_class=_ConfigDefaultsHelpFormatter,
+    )
+    receive_parser.add_argument(
+        "-p", "--port",
+        type=int,
+        help="Server port",
+    )
+    receive_parser.add_argument(
+        "-H", "--host",
+        help="Server host",
+    )
+
+
+def _add_version_parser(subparsers):
+    """Register the version command."""
+    subparsers.add_parser("version", help="Show version information")
+
+
+# Subparser builders, in the order they appear in --help
+_SUBPARSERS = {
+    "send": _add_send_parser,
+    "receive": _add_receive_parser,
+    "version": _add_version_parser,
+}
+
+
 def _start_server(host: str, port: int):
     """Start the FastAPI server."""
+    from flashare.config import config
     from flashare.server import run_server
+    from flashare.cli.ui import (
+        console,
+        print_qr_code,
+        print_server_info,
+        print_success,
+        print_info,
+    )
+    
+    config.ensure_uploads_dir()
     
     console.print()
     print_server_info(host, port)
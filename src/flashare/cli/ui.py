@@ -5,13 +5,11 @@ from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.table import Table
 from rich.text import Text
-from rich.layout import Layout
 from rich.align import Align
-from rich.rule import Rule
 from rich import box
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
-from datetime import datetime
 
 from flashare import __app_name__, __version__
 from flashare.core.qr import generate_qr_ascii
@@ -26,6 +24,7 @@ console = Console(
     soft_wrap=True,
 )
 
+
 # Modern color palette
 COLOR_PRIMARY = "cyan"
 COLOR_SUCCESS = "green"
@@ -257,6 +256,8 @@ def print_separator(title: Optional[str] = None):
     Args:
         title: Optional title for the separator.
     """
+    from rich.rule import Rule
+    
     if title:
         console.print(
             Rule(
@@ -352,22 +353,23 @@ def print_transfer_summary(
     console.print()
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
+@lru_cache(maxsize=256)
 def _format_size(size_bytes: int) -> str:
     """
     Format bytes as human-readable size with color coding.
     
+    The unit is picked from the integer bit length, so only the final
+    value is computed in floating point. Results are cached because
+    progress updates re-render the same sizes.
+    
     Args:
         size_bytes: Size in bytes.
         
     Returns:
         Formatted size string.
     """
-    units = ['B', 'KB', 'MB', 'GB', 'TB']
-    size = float(size_bytes)
-    
-    for unit in units:
-        if size < 1024:
-            return f"{size:.1f} {unit}"
-        size /= 1024
-    
-    return f"{size:.1f} PB"
+    idx = min(max((size_bytes.bit_length() - 1) // 10, 0), len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (idx * 10)):.1f} {_SIZE_UNITS[idx]}"
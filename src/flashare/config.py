@@ -2,9 +2,27 @@
 
 import os
 from pathlib import Path
+from typing import Optional
 from dataclasses import dataclass, field
 
 
+def _env_positive_int(name: str, default: int) -> int:
+    """
+    Read a positive integer from the environment.
+    
+    Args:
+        name: Environment variable name.
+        default: Value used when the variable is unset or not an integer.
+        
+    Returns:
+        The parsed value, clamped to at least 1.
+    """
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
 @dataclass
 class Config:
     """Application configuration."""
@@ -17,15 +35,43 @@ class Config:
     # FFmpeg settings
     ffmpeg_preset: str = "ultrafast"
     ffmpeg_crf: int = 28
-    video_extensions: tuple = (".mov", ".mkv", ".avi", ".mp4", ".webm")
+    ffmpeg_hwaccel: Optional[str] = "auto"  # "auto", None for software, or nvenc/videotoolbox/qsv/vaapi/amf
+    ffmpeg_threads: int = 0  # 0 = let FFmpeg pick per core count
+    x265_pools: str = "*"  # Thread pools across all NUMA nodes
+    x265_frame_threads: int = 0  # 0 = x265 auto-detects from core count
+    video_extensions: frozenset = frozenset({".mov", ".mkv", ".avi", ".mp4", ".webm"})
     
     # Compression settings
     zstd_level: int = 3
-    chunk_size: int = 1024 * 64  # 64KB chunks
+    zstd_threads: int = -1  # -1 = one worker per CPU
+    zstd_threads_min_size: int = 8 * 1024 * 1024  # Smaller files compress single-threaded
+    zstd_dict_size: int = 16 * 1024
+    zstd_dict_min_samples: int = 100
+    zstd_dict_max_file_size: int = 128 * 1024  # Only small files benefit from a dictionary
+    chunk_size: int = 1024 * 1024  # 1MB chunks
+    
+    # Staging settings
+    stage_hardlinks: bool = field(
+        default_factory=lambda: os.environ.get("FLASHARE_STAGE_HARDLINKS") == "1"
+    )  # Hard links alias the original file; clones and copies do not
+    
+    # Concurrency settings
+    max_concurrent_uploads: int = field(
+        default_factory=lambda: _env_positive_int("FLASHARE_MAX_CONCURRENT_UPLOADS", 8)
+    )
     
-    def __post_init__(self):
-        """Ensure uploads directory exists."""
+    def ensure_uploads_dir(self) -> Path:
+        """
+        Create the uploads directory if it does not exist yet.
+        
+        Called right before files are written or served rather than at
+        import, so commands like --version never touch the filesystem.
+        
+        Returns:
+            The uploads directory.
+        """
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        return self.uploads_dir
 
 
 # Global config instance
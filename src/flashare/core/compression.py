@@ -1,28 +1,264 @@
 """Zstandard compression utilities for Flashare."""
 
+import os
+import queue
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Generator, BinaryIO
+from typing import Generator, BinaryIO, Iterator, Optional
 import zstandard as zstd
 
 from flashare.config import config
 
 
-def create_compressor(level: int | None = None) -> zstd.ZstdCompressor:
+def create_compressor(
+    level: int | None = None,
+    dict_data: Optional[zstd.ZstdCompressionDict] = None,
+    threads: int | None = None,
+) -> zstd.ZstdCompressor:
     """
     Create a Zstandard compressor instance.
     
     Args:
         level: Compression level (1-22). Higher = better compression, slower.
+        dict_data: Optional trained dictionary to compress with.
+        threads: Worker threads (0 = single-threaded). Defaults to config value.
         
     Returns:
         A ZstdCompressor instance.
     """
-    return zstd.ZstdCompressor(level=level or config.zstd_level)
+    return zstd.ZstdCompressor(
+        level=level or config.zstd_level,
+        dict_data=dict_data,
+        threads=config.zstd_threads if threads is None else threads,
+    )
+
+
+def compression_threads(size: int | None) -> int:
+    """
+    Pick the zstd worker count for an input of the given size.
+    
+    Multi-threaded zstd splits the input into jobs several MB large, so
+    smaller inputs would only pay for the idle worker threads.
+    
+    Args:
+        size: Input size in bytes, or None if unknown.
+        
+    Returns:
+        config.zstd_threads for large or unknown inputs, otherwise 0.
+    """
+    if size is not None and size < config.zstd_threads_min_size:
+        return 0
+    return config.zstd_threads
+
+
+# Idle compressors keyed by (dictionary ID, threads), reused across
+# requests to avoid reallocating contexts. Each multi-threaded compressor
+# holds its own worker threads and buffers, so only a few are kept idle
+_compressor_pools: dict[tuple[int, int], "queue.SimpleQueue[zstd.ZstdCompressor]"] = {}
+_POOL_MAX_IDLE = max(2, (os.cpu_count() or 1) // 4)
+
+
+@contextmanager
+def pooled_compressor(
+    dict_data: Optional[zstd.ZstdCompressionDict] = None,
+    size: int | None = None,
+) -> Iterator[zstd.ZstdCompressor]:
+    """
+    Borrow a compressor from the shared pool.
+    
+    A ZstdCompressor must not be used by two streams at once, so each
+    stream holds its own instance and returns it to the pool when done.
+    Compressors beyond _POOL_MAX_IDLE are dropped instead of returned.
+    
+    Args:
+        dict_data: Optional trained dictionary the compressor should use.
+        size: Input size in bytes, used to pick the thread count.
+    
+    Yields:
+        A ZstdCompressor at the default level.
+    """
+    threads = compression_threads(size)
+    pool = _compressor_pools.setdefault(
+        (dict_data.dict_id() if dict_data else 0, threads), queue.SimpleQueue()
+    )
+    try:
+        compressor = pool.get_nowait()
+    except queue.Empty:
+        compressor = create_compressor(dict_data=dict_data, threads=threads)
+    try:
+        yield compressor
+    finally:
+        if pool.qsize() < _POOL_MAX_IDLE:
+            pool.put(compressor)
+
+
+def stream_chunk_size() -> int:
+    """
+    Chunk size for compressed download streams.
+    
+    Large chunks amortize per-chunk Python overhead, but at high levels
+    compression itself is the bottleneck, so 64KB chunks keep data
+    flowing to the client sooner.
+    """
+    if config.zstd_level >= 10:
+        return min(config.chunk_size, 64 * 1024)
+    return config.chunk_size
+
+
+# Formats that are already compressed; zstd would spend a full CPU pass on
+# them for next to no size reduction
+INCOMPRESSIBLE_EXTENSIONS = frozenset({
+    ".mp4", ".mkv", ".mov", ".webm", ".m4v", ".avi",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".mp3", ".aac", ".m4a", ".ogg", ".flac",
+    ".zip", ".gz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+})
+
+
+def is_incompressible(file_path: Path | str) -> bool:
+    """
+    Check if a file is already compressed, based on its extension.
+    
+    Args:
+        file_path: Path to the file to check.
+        
+    Returns:
+        True if zstd is unlikely to shrink the file.
+    """
+    return Path(file_path).suffix.lower() in INCOMPRESSIBLE_EXTENSIONS
+
+
+def should_compress(file_path: Path | str) -> bool:
+    """Check if a file is worth compressing before it is sent."""
+    return not is_incompressible(file_path)
+
+
+# ==================== Dictionary Support ====================
+
+# Kept in memory only and tied to the directory it was trained from, so
+# content from one uploads dir never ends up in another dir's dictionary
+_dictionary: Optional[zstd.ZstdCompressionDict] = None
+_dictionary_dir: Optional[Path] = None
+
+# Text-heavy formats whose small files share enough structure for a
+# dictionary to pay off
+DICTIONARY_EXTENSIONS = frozenset({
+    ".json", ".txt", ".csv", ".log", ".py", ".md", ".html",
+})
+
+
+@lru_cache(maxsize=8)
+def _resolved_dir(directory: Path) -> Path:
+    """Resolve a directory once, so per-download checks make no syscall."""
+    return directory.resolve()
+
+
+def get_dictionary() -> Optional[zstd.ZstdCompressionDict]:
+    """
+    Return the small-file dictionary for the current uploads directory.
+    
+    A dictionary trained from a different directory is discarded.
+    
+    Returns:
+        The active dictionary, or None if none has been trained.
+    """
+    global _dictionary, _dictionary_dir
+    
+    if _dictionary is not None and _dictionary_dir != _resolved_dir(config.uploads_dir):
+        _dictionary = _dictionary_dir = None
+    return _dictionary
+
+
+def uses_dictionary(file_path: Path | str, size: int) -> bool:
+    """
+    Check if a file should be compressed with the small-file dictionary.
+    
+    Args:
+        file_path: Path to the file.
+        size: File size in bytes.
+        
+    Returns:
+        True for small text-heavy files.
+    """
+    return (
+        size <= config.zstd_dict_max_file_size
+        and Path(file_path).suffix.lower() in DICTIONARY_EXTENSIONS
+    )
+
+
+def train_dictionary(
+    directory: Path | str | None = None,
+    max_samples: int = 512,
+) -> Optional[zstd.ZstdCompressionDict]:
+    """
+    Train a dictionary from the small text files in a directory.
+    
+    Small payloads compress poorly on their own; a shared dictionary
+    gives zstd the context it would otherwise lack. The dictionary only
+    becomes active while that directory is the uploads directory.
+    
+    Args:
+        directory: Directory to sample. Defaults to the uploads directory.
+        max_samples: Maximum number of files to sample.
+        
+    Returns:
+        The trained dictionary, or None if there were too few samples.
+    """
+    global _dictionary, _dictionary_dir
+    
+    directory = _resolved_dir(Path(directory or config.uploads_dir))
+    
+    with os.scandir(directory) as entries:
+        paths = sorted(
+            entry.path for entry in entries
+            if entry.is_file(follow_symlinks=False)
+            and not entry.name.startswith('.')
+            and uses_dictionary(entry.name, entry.stat().st_size)
+        )[:max_samples]
+    
+    if len(paths) < config.zstd_dict_min_samples:
+        return None
+    
+    samples = [Path(p).read_bytes() for p in paths]
+    
+    try:
+        dictionary = zstd.train_dictionary(config.zstd_dict_size, samples)
+    except zstd.ZstdError:
+        return None
+    
+    dictionary.precompute_compress(level=config.zstd_level)
+    _dictionary, _dictionary_dir = dictionary, directory
+    return dictionary
+
+
+def _read_blocks(f_in: BinaryIO, block_size: int) -> Iterator[memoryview]:
+    """
+    Yield consecutive blocks of a file read into one reused buffer.
+    
+    The file should be opened unbuffered, so readinto() fills the buffer
+    straight from the kernel without a BufferedReader copy. Unlike mmap,
+    a file that shrinks mid-read just ends early instead of raising
+    SIGBUS, which matters for staged files the user may still edit.
+    
+    Args:
+        f_in: File opened for binary reading.
+        block_size: Maximum size of each block.
+        
+    Yields:
+        Views into the shared buffer; each is only valid until the next.
+    """
+    buffer = bytearray(block_size)
+    with memoryview(buffer) as view:
+        while n := f_in.readinto(buffer):
+            yield view[:n]
 
 
 def generate_compressed_stream(
     file_path: Path | str,
-    chunk_size: int | None = None
+    chunk_size: int | None = None,
+    dict_data: Optional[zstd.ZstdCompressionDict] = None,
+    size: int | None = None,
 ) -> Generator[bytes, None, None]:
     """
     Generate compressed chunks from a file using Zstandard.
@@ -32,17 +268,25 @@ def generate_compressed_stream(
     
     Args:
         file_path: Path to the file to compress.
-        chunk_size: Size of chunks to read. Defaults to config value.
+        chunk_size: Size of chunks to read. Defaults to stream_chunk_size().
+        dict_data: Optional trained dictionary to compress with.
+        size: File size in bytes, if already known; small files are
+            compressed single-threaded.
         
     Yields:
         Compressed byte chunks.
     """
-    chunk_size = chunk_size or config.chunk_size
-    compressor = create_compressor()
+    chunk_size = chunk_size or stream_chunk_size()
     
-    with open(file_path, 'rb') as f_in:
-        for chunk in compressor.read_to_iter(f_in, size=chunk_size):
-            yield chunk
+    with pooled_compressor(dict_data, size) as compressor, open(file_path, 'rb', buffering=0) as f_in:
+        # The chunker emits output in exact chunk_size blocks, so there is one
+        # Python round-trip per chunk_size of output. The content size is not
+        # declared up front since the file may change while it streams
+        chunker = compressor.chunker(chunk_size=chunk_size)
+        
+        for block in _read_blocks(f_in, chunk_size):
+            yield from chunker.compress(block)
+        yield from chunker.finish()
 
 
 def compress_file(input_path: Path | str, output_path: Path | str) -> Path:
@@ -59,11 +303,15 @@ def compress_file(input_path: Path | str, output_path: Path | str) -> Path:
     input_path = Path(input_path)
     output_path = Path(output_path)
     
-    compressor = create_compressor()
+    compressor = create_compressor(threads=compression_threads(input_path.stat().st_size))
     
-    with open(input_path, 'rb') as f_in:
+    with open(input_path, 'rb', buffering=0) as f_in:
         with open(output_path, 'wb') as f_out:
-            compressor.copy_stream(f_in, f_out)
+            chunker = compressor.chunker(chunk_size=config.chunk_size)
+            
+            for block in _read_blocks(f_in, config.chunk_size):
+                f_out.writelines(chunker.compress(block))
+            f_out.writelines(chunker.finish())
     
     return output_path
 
@@ -85,5 +333,5 @@ def decompress_stream(
     chunk_size = chunk_size or config.chunk_size
     decompressor = zstd.ZstdDecompressor()
     
-    for chunk in decompressor.read_to_iter(input_stream, size=chunk_size):
+    for chunk in decompressor.read_to_iter(input_stream, read_size=chunk_size):
         yield chunk
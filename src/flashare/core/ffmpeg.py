@@ -1,9 +1,17 @@
 """FFmpeg video optimization utilities for Flashare."""
 
+import os
+import asyncio
+import stat
 import subprocess
 import shutil
+import threading
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Generator, Optional
+
+import orjson
 from dataclasses import dataclass
 
 from flashare.config import config
@@ -34,9 +42,195 @@ class OptimizationResult:
         return None
 
 
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> Optional[str]:
+    """
+    Locate the FFmpeg binary, once per process.
+    
+    FLASHARE_FFMPEG, when set, is used as-is and skips the PATH search.
+    
+    Returns:
+        Path to ffmpeg, or None if not found.
+    """
+    return os.environ.get("FLASHARE_FFMPEG") or shutil.which("ffmpeg")
+
+
 def is_ffmpeg_available() -> bool:
     """Check if FFmpeg is available on the system."""
-    return shutil.which("ffmpeg") is not None
+    return find_ffmpeg() is not None
+
+
+@lru_cache(maxsize=1)
+def find_ffprobe() -> Optional[str]:
+    """
+    Locate the FFprobe binary, once per process.
+    
+    FLASHARE_FFPROBE, when set, is used as-is and skips the PATH search.
+    
+    Returns:
+        Path to ffprobe, or None if not found.
+    """
+    return os.environ.get("FLASHARE_FFPROBE") or shutil.which("ffprobe")
+
+
+# Hardware HEVC encoder backends, in order of preference
+HW_ENCODERS = ("nvenc", "videotoolbox", "qsv", "vaapi", "amf")
+
+
+def _hwencoder_works(backend: str) -> bool:
+    """
+    Check that a hardware encoder can actually encode on this machine.
+    
+    `ffmpeg -encoders` lists what the build was compiled with, not what
+    the hardware supports, so this encodes a single blank frame.
+    
+    Args:
+        backend: Hardware backend from HW_ENCODERS.
+        
+    Returns:
+        True if the test encode succeeded.
+    """
+    input_args, video_args = _encoder_args(backend, config.ffmpeg_preset, config.ffmpeg_crf)
+    cmd = [
+        find_ffmpeg(), "-hide_banner", "-loglevel", "error",
+        *input_args,
+        "-f", "lavfi", "-i", "nullsrc",
+        "-frames:v", "1",
+        *video_args,
+        "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+        )
+    except Exception:
+        return False
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=1)
+def detect_hwencoder() -> Optional[str]:
+    """
+    Detect a working hardware HEVC encoder.
+    
+    Runs `ffmpeg -encoders` once per process, then test-encodes one frame
+    with each compiled-in candidate until one succeeds.
+    
+    Returns:
+        The first working backend from HW_ENCODERS, or None.
+    """
+    if not is_ffmpeg_available():
+        return None
+    
+    try:
+        result = subprocess.run(
+            [find_ffmpeg(), "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except Exception:
+        return None
+    
+    return next(
+        (b for b in HW_ENCODERS if f"hevc_{b}" in result.stdout and _hwencoder_works(b)),
+        None,
+    )
+
+
+def select_hwencoder() -> Optional[str]:
+    """Resolve config.ffmpeg_hwaccel to a hardware backend, or None for software."""
+    if config.ffmpeg_hwaccel == "auto":
+        return detect_hwencoder()
+    return config.ffmpeg_hwaccel or None
+
+
+def max_concurrent_encodes() -> int:
+    """
+    How many videos can be optimized at once without oversubscribing.
+    
+    A libx265 encode with automatic threading already uses every core,
+    so those run one at a time; with a fixed thread count, as many run as
+    fit in the CPU. Hardware encoders barely touch the CPU, but GPUs cap
+    concurrent encode sessions, so they are limited to two.
+    
+    Returns:
+        The number of encodes to run in parallel, at least 1.
+    """
+    if select_hwencoder():
+        return 2
+    if config.ffmpeg_threads <= 0:
+        return 1
+    return max(1, (os.cpu_count() or 1) // config.ffmpeg_threads)
+
+
+X265_PRESETS = frozenset({
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow", "placebo",
+})
+
+
+def _encoder_args(
+    encoder: Optional[str],
+    preset: str,
+    crf: int,
+    threads: int = 0,
+    pools: str = "*",
+    frame_threads: int = 0,
+) -> tuple[list[str], list[str]]:
+    """
+    Build FFmpeg arguments for an HEVC encoder.
+    
+    Only the NVENC path enables hardware decoding; `-hwaccel auto` on other
+    paths affects decoding only and can slow the encode down.
+    
+    libx265 runs with wavefront parallel processing (WPP) and frame-level
+    threading. WPP only adds entry points to the bitstream, which every
+    HEVC decoder must accept, so the output stays universally playable.
+    
+    Args:
+        encoder: Hardware backend from HW_ENCODERS, or None for libx265.
+        preset: Software preset (libx265 only).
+        crf: Quality target, mapped onto each encoder's own scale.
+        threads: FFmpeg thread count (libx265 only); 0 picks automatically.
+        pools: x265 thread pool layout (libx265 only).
+        frame_threads: Concurrently encoded frames (libx265 only); 0 is auto.
+    
+    Returns:
+        Tuple of (arguments placed before -i, video encoding arguments).
+    """
+    if encoder == "nvenc":
+        return (
+            ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"],
+            ["-c:v", "hevc_nvenc", "-preset", "p1", "-cq", str(crf)],
+        )
+    if encoder == "videotoolbox":
+        # VideoToolbox has no CRF; map 0-51 onto its 1-100 quality scale
+        return [], ["-c:v", "hevc_videotoolbox", "-q:v", str(max(1, 100 - crf * 2)), "-tag:v", "hvc1"]
+    if encoder == "qsv":
+        return [], ["-c:v", "hevc_qsv", "-preset", "veryfast", "-global_quality", str(crf)]
+    if encoder == "vaapi":
+        return (
+            ["-vaapi_device", "/dev/dri/renderD128"],
+            ["-vf", "format=nv12,hwupload", "-c:v", "hevc_vaapi", "-qp", str(crf)],
+        )
+    if encoder == "amf":
+        return [], ["-c:v", "hevc_amf", "-quality", "speed", "-rc", "cqp", "-qp_i", str(crf), "-qp_p", str(crf)]
+    return [], [
+        "-vcodec", "libx265",
+        "-crf", str(crf),
+        "-preset", preset,
+        "-threads", str(threads),
+        "-x265-params", f"pools={pools}:wpp=1:frame-threads={frame_threads}",
+    ]
+
+
+# Normalized once so user-configured extensions like ".MP4" still match
+_VIDEO_EXTS: frozenset[str] = frozenset(ext.lower() for ext in config.video_extensions)
 
 
 def is_video_file(file_path: Path | str) -> bool:
@@ -49,48 +243,232 @@ def is_video_file(file_path: Path | str) -> bool:
     Returns:
         True if the file appears to be a video.
     """
-    file_path = Path(file_path)
-    return file_path.suffix.lower() in config.video_extensions
+    # splitext works on str and Path alike, without building a Path
+    return os.path.splitext(file_path)[1].lower() in _VIDEO_EXTS
 
 
-def optimize_video(
-    input_path: Path | str,
-    output_path: Optional[Path | str] = None,
-    preset: Optional[str] = None,
-    crf: Optional[int] = None,
-) -> OptimizationResult:
+def get_duration(file_path: Path | str) -> Optional[float]:
     """
-    Optimize a video file using FFmpeg with H.265 encoding.
+    Get a media file's duration in seconds using FFprobe.
     
     Args:
-        input_path: Path to the input video file.
-        output_path: Path for the output file. If None, creates .optimized.mp4.
-        preset: FFmpeg preset (ultrafast, superfast, veryfast, faster, fast,
-                medium, slow, slower, veryslow). Defaults to config value.
-        crf: Constant Rate Factor (0-51, lower = better quality).
-             Defaults to config value.
+        file_path: Path to the media file.
+        
+    Returns:
+        Duration in seconds, or None if unknown.
+    """
+    ffprobe = find_ffprobe()
+    if ffprobe is None:
+        return None
+    
+    cmd = [
+        ffprobe,
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "csv=p=0",
+        str(file_path),
+    ]
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        return float(result.stdout.strip()) if result.returncode == 0 else None
+    except (subprocess.TimeoutExpired, ValueError, OSError):
+        return None
+
+
+# Longest a single FFmpeg run may take before it is killed
+FFMPEG_TIMEOUT = 3600  # 1 hour
+
+
+def _report_progress(
+    line: str,
+    duration: Optional[float],
+    on_progress: Optional[Callable[[float], None]],
+) -> None:
+    """Forward one line of FFmpeg's `-progress` output as a percentage."""
+    if on_progress is None:
+        return
+    
+    key, _, value = line.strip().partition("=")
+    # out_time_ms is in microseconds, despite its name
+    if key == "out_time_ms" and value.isdigit():
+        if duration:
+            on_progress(min(int(value) / 1e6 / duration * 100, 100.0))
+    elif key == "progress" and value == "end":
+        on_progress(100.0)
+
+
+def _run_ffmpeg(
+    cmd: list[str],
+    duration: Optional[float],
+    on_progress: Optional[Callable[[float], None]],
+    timeout: float,
+    stdin: Optional[int] = None,
+) -> tuple[int, str]:
+    """
+    Run FFmpeg, reporting progress parsed from its `-progress pipe:1` output.
     
+    Args:
+        cmd: FFmpeg command; must write progress to stdout.
+        duration: Input duration in seconds, needed to compute percentages.
+        on_progress: Called with the completed percentage (0-100).
+        timeout: Seconds before the process is killed.
+        stdin: Descriptor handed to FFmpeg as stdin; /dev/null if None.
+        
     Returns:
-        OptimizationResult with details about the operation.
+        Tuple of (return code, last lines of stderr).
+        
+    Raises:
+        subprocess.TimeoutExpired: If FFmpeg ran longer than timeout.
+    """
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL if stdin is None else stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=1,
+        text=True,
+        errors="replace",
+    ) as proc:
+        # Drain stderr on a thread so FFmpeg never blocks on a full pipe;
+        # only the tail is kept, so memory stays bounded however long it runs
+        stderr_tail: deque[str] = deque(maxlen=64)
+        reader = threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True)
+        reader.start()
+        
+        # A stalled encode stops writing progress lines, so the timeout is
+        # enforced by a timer rather than between reads
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            proc.kill()
+        
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                _report_progress(line, duration, on_progress)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            reader.join()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    
+    return returncode, "".join(stderr_tail)
+
+
+async def _run_ffmpeg_async(
+    cmd: list[str],
+    duration: Optional[float],
+    on_progress: Optional[Callable[[float], None]],
+    timeout: float,
+    stdin: Optional[int] = None,
+) -> tuple[int, str]:
+    """
+    Async counterpart of _run_ffmpeg, driven by the running event loop.
+    
+    Args:
+        cmd: FFmpeg command; must write progress to stdout.
+        duration: Input duration in seconds, needed to compute percentages.
+        on_progress: Called with the completed percentage (0-100).
+        timeout: Seconds before the process is killed.
+        stdin: Descriptor handed to FFmpeg as stdin; /dev/null if None.
+        
+    Returns:
+        Tuple of (return code, last lines of stderr).
+        
+    Raises:
+        subprocess.TimeoutExpired: If FFmpeg ran longer than timeout.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL if stdin is None else stdin,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_tail: deque[str] = deque(maxlen=64)
+    
+    async def drain_stderr():
+        async for line in proc.stderr:
+            stderr_tail.append(line.decode(errors="replace"))
+    
+    async def read_progress():
+        async for line in proc.stdout:
+            _report_progress(line.decode(errors="replace"), duration, on_progress)
+    
+    try:
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(drain_stderr(), read_progress())
+            returncode = await proc.wait()
+    except TimeoutError:
+        raise subprocess.TimeoutExpired(cmd, timeout) from None
+    finally:
+        # Also reached on cancellation; never leave an encode running
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+    
+    return returncode, "".join(stderr_tail)
+
+
+def _optimization_steps(
+    input_path: Path | str,
+    output_path: Optional[Path | str],
+    preset: Optional[str],
+    crf: Optional[int],
+    threads: Optional[int],
+    pools: Optional[str],
+    frame_threads: Optional[int],
+    hwaccel: bool,
+    input_fd: Optional[int],
+) -> Generator[list[str], tuple[int, str], OptimizationResult]:
+    """
+    Plan a video optimization without running anything.
+    
+    Shared by optimize_video and optimize_video_async: yields each FFmpeg
+    command, expects (return code, stderr) sent back, and returns the
+    OptimizationResult. Runner exceptions are thrown back in so they are
+    reported the same way for both callers.
     """
     input_path = Path(input_path)
+    seekable = True
     
-    if not input_path.exists():
-        return OptimizationResult(
-            success=False,
-            input_path=input_path,
-            output_path=None,
-            input_size=0,
-            output_size=None,
-            error=f"Input file not found: {input_path}"
-        )
+    if input_fd is not None:
+        # FFmpeg reads the descriptor as its stdin. A regular file opened
+        # through /dev/stdin stays seekable, which MP4/MOV inputs with a
+        # trailing moov atom need; pipes and sockets can only be read once.
+        # Windows has no /dev/stdin, so there FFmpeg always streams pipe:0
+        fd_stat = os.fstat(input_fd)
+        seekable = stat.S_ISREG(fd_stat.st_mode)
+        input_size = fd_stat.st_size if seekable else 0
+        input_spec = "/dev/stdin" if seekable and os.name != "nt" else "pipe:0"
+    else:
+        # One stat serves both the existence check and the input size
+        try:
+            input_size = input_path.stat().st_size
+        except FileNotFoundError:
+            return OptimizationResult(
+                success=False,
+                input_path=input_path,
+                output_path=None,
+                input_size=0,
+                output_size=None,
+                error=f"Input file not found: {input_path}"
+            )
+        input_spec = str(input_path)
     
     if not is_ffmpeg_available():
         return OptimizationResult(
             success=False,
             input_path=input_path,
             output_path=None,
-            input_size=input_path.stat().st_size,
+            input_size=input_size,
             output_size=None,
             error="FFmpeg is not installed or not in PATH"
         )
@@ -101,40 +479,62 @@ def optimize_video(
     else:
         output_path = Path(output_path)
     
-    # Get input file size
-    input_size = input_path.stat().st_size
-    
     # Build FFmpeg command
     preset = preset or config.ffmpeg_preset
     crf = crf or config.ffmpeg_crf
+    x265_args = (
+        config.ffmpeg_threads if threads is None else threads,
+        pools or config.x265_pools,
+        config.x265_frame_threads if frame_threads is None else frame_threads,
+    )
     
-    cmd = [
-        "ffmpeg",
-        "-i", str(input_path),
-        "-vcodec", "libx265",
-        "-crf", str(crf),
-        "-preset", preset,
-        "-acodec", "aac",
-        "-y",  # Overwrite output
-        str(output_path)
-    ]
+    if preset not in X265_PRESETS:
+        return OptimizationResult(
+            success=False,
+            input_path=input_path,
+            output_path=None,
+            input_size=input_size,
+            output_size=None,
+            error=f"Unknown preset: {preset}"
+        )
+    
+    encoder = select_hwencoder() if hwaccel else None
     
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=3600  # 1 hour timeout
-        )
+        # Try the hardware encoder first, then software if it fails; a
+        # one-shot stream only gets a single attempt
+        attempts = dict.fromkeys([encoder, None]) if seekable else [encoder]
+        for attempt in attempts:
+            if input_fd is not None and seekable:
+                os.lseek(input_fd, 0, os.SEEK_SET)
+            
+            input_args, video_args = _encoder_args(attempt, preset, crf, *x265_args)
+            cmd = [
+                find_ffmpeg(),
+                *input_args,
+                "-i", input_spec,
+                *video_args,
+                "-acodec", "aac",
+                "-progress", "pipe:1",
+                "-nostats",
+                "-loglevel", "error",
+                "-y",  # Overwrite output
+                str(output_path)
+            ]
+            
+            returncode, stderr = yield cmd
+            
+            if returncode == 0:
+                break
         
-        if result.returncode != 0:
+        if returncode != 0:
             return OptimizationResult(
                 success=False,
                 input_path=input_path,
                 output_path=output_path,
                 input_size=input_size,
                 output_size=None,
-                error=f"FFmpeg error: {result.stderr[:500]}"
+                error=f"FFmpeg error: {stderr[-500:]}"
             )
         
         output_size = output_path.stat().st_size
@@ -167,38 +567,157 @@ def optimize_video(
         )
 
 
+def optimize_video(
+    input_path: Path | str,
+    output_path: Optional[Path | str] = None,
+    preset: Optional[str] = None,
+    crf: Optional[int] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+    threads: Optional[int] = None,
+    pools: Optional[str] = None,
+    frame_threads: Optional[int] = None,
+    hwaccel: bool = True,
+    input_fd: Optional[int] = None,
+) -> OptimizationResult:
+    """
+    Optimize a video file using FFmpeg with H.265 encoding.
+    
+    Uses a hardware encoder when one is available (see config.ffmpeg_hwaccel),
+    falling back to libx265 if the hardware encode fails.
+    
+    Args:
+        input_path: Path to the input video file.
+        output_path: Path for the output file. If None, creates .optimized.mp4.
+        preset: FFmpeg preset (ultrafast, superfast, veryfast, faster, fast,
+                medium, slow, slower, veryslow). Defaults to config value.
+        crf: Constant Rate Factor (0-51, lower = better quality).
+             Defaults to config value.
+        on_progress: Optional callback receiving the completed percentage
+             (0-100), parsed from FFmpeg's -progress output.
+        threads: libx265 thread count (0 = auto). Defaults to config value.
+        pools: x265 thread pool layout. Defaults to config value.
+        frame_threads: x265 frame threads (0 = auto). Defaults to config value.
+        hwaccel: Use the hardware encoder chosen by config.ffmpeg_hwaccel.
+             False always encodes with libx265.
+        input_fd: Already-open descriptor to read the video from instead of
+             input_path; FFmpeg inherits it as stdin, so no data passes
+             through Python. input_path still names the output and result.
+             On Windows FFmpeg cannot seek it, so MP4/MOV files whose
+             moov atom comes last should be passed by path instead.
+    
+    Returns:
+        OptimizationResult with details about the operation.
+    """
+    steps = _optimization_steps(
+        input_path, output_path, preset, crf, threads, pools, frame_threads, hwaccel, input_fd,
+    )
+    duration = get_duration(input_path) if on_progress else None
+    
+    try:
+        cmd = next(steps)
+        while True:
+            try:
+                outcome = _run_ffmpeg(cmd, duration, on_progress, FFMPEG_TIMEOUT, input_fd)
+            except Exception as e:
+                cmd = steps.throw(e)
+            else:
+                cmd = steps.send(outcome)
+    except StopIteration as done:
+        return done.value
+
+
+async def optimize_video_async(
+    input_path: Path | str,
+    output_path: Optional[Path | str] = None,
+    preset: Optional[str] = None,
+    crf: Optional[int] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+    threads: Optional[int] = None,
+    pools: Optional[str] = None,
+    frame_threads: Optional[int] = None,
+    hwaccel: bool = True,
+    input_fd: Optional[int] = None,
+) -> OptimizationResult:
+    """
+    Optimize a video file without blocking the event loop.
+    
+    Same arguments and result as optimize_video, but FFmpeg runs under
+    asyncio's subprocess support, so an hour-long encode does not hold a
+    worker thread. Blocking probes (encoder detection, duration) run in
+    the default executor.
+    
+    Returns:
+        OptimizationResult with details about the operation.
+    """
+    if hwaccel:
+        # Warm the cached encoder probe off the loop
+        await asyncio.to_thread(select_hwencoder)
+    duration = await asyncio.to_thread(get_duration, input_path) if on_progress else None
+    
+    steps = _optimization_steps(
+        input_path, output_path, preset, crf, threads, pools, frame_threads, hwaccel, input_fd,
+    )
+    
+    try:
+        cmd = next(steps)
+        while True:
+            try:
+                outcome = await _run_ffmpeg_async(cmd, duration, on_progress, FFMPEG_TIMEOUT, input_fd)
+            except Exception as e:
+                cmd = steps.throw(e)
+            else:
+                cmd = steps.send(outcome)
+    except StopIteration as done:
+        return done.value
+
+
 def get_video_info(file_path: Path | str) -> Optional[dict]:
     """
     Get video file information using FFprobe.
     
+    Probe output is cached per file version (path, mtime and size), so
+    repeat queries for an unchanged file spawn no process.
+    
     Args:
         file_path: Path to the video file.
         
     Returns:
         Dictionary with video info, or None if unavailable.
     """
-    if not shutil.which("ffprobe"):
+    if find_ffprobe() is None:
         return None
     
-    file_path = Path(file_path)
-    
-    if not file_path.exists():
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
         return None
     
+    output = _probe(os.fspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    # Parsed per call so callers never share a mutable dict
+    return orjson.loads(output) if output is not None else None
+
+
+@lru_cache(maxsize=256)
+def _probe(file_path: str, mtime_ns: int, size: int) -> Optional[bytes]:
+    """
+    Run FFprobe on a file and return its raw JSON output.
+    
+    mtime_ns and size are not used directly; they key the cache so a
+    modified file is probed again.
+    """
     cmd = [
-        "ffprobe",
+        find_ffprobe(),
         "-v", "quiet",
         "-print_format", "json",
         "-show_format",
         "-show_streams",
-        str(file_path)
+        file_path,
     ]
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(cmd, capture_output=True)
         if result.returncode == 0:
-            import json
-            return json.loads(result.stdout)
+            return result.stdout
     except Exception:
         pass
     
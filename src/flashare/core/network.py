@@ -1,16 +1,67 @@
 """Network utilities for Flashare."""
 
+import ipaddress
 import socket
 from functools import lru_cache
 
+try:
+    import ifaddr
+except ImportError:  # Optional: pip install flashare[network]
+    ifaddr = None
 
-@lru_cache(maxsize=1)
-def get_local_ip() -> str:
+
+# Container and VM bridges are never the address a phone on the LAN can reach.
+# Matched case-insensitively against the adapter name and, since Windows
+# names adapters by GUID, its friendly name (e.g. "vEthernet (WSL)")
+_VIRTUAL_ADAPTER_PREFIXES = (
+    "docker", "br-", "veth", "virbr", "vmnet", "vboxnet", "utun", "tun", "tap",
+    "virtualbox", "vmware", "hyper-v",
+)
+
+
+def _is_virtual_adapter(adapter) -> bool:
+    """Check if an ifaddr adapter is a container, VM or VPN interface."""
+    return any(
+        name.lower().startswith(_VIRTUAL_ADAPTER_PREFIXES)
+        for name in (adapter.name, adapter.nice_name)
+        if isinstance(name, str)
+    )
+
+
+def _adapter_ips() -> list[str]:
     """
-    Auto-detect the local IP address for QR codes and BLE advertising.
+    List the LAN IPv4 addresses of the host's network adapters.
+    
+    Reads the interface table only; get_local_ip falls back to the
+    routing lookup when this list is empty.
     
     Returns:
-        The local IP address as a string.
+        The IPv4 addresses, private (RFC 1918) ranges first, otherwise in
+        adapter order; empty if ifaddr is unavailable.
+    """
+    if ifaddr is None:
+        return []
+    
+    ips = [
+        ip.ip
+        for adapter in ifaddr.get_adapters()
+        if not _is_virtual_adapter(adapter)
+        for ip in adapter.ips
+        # IPv6 addresses are tuples; skip loopback and link-local too
+        if isinstance(ip.ip, str)
+        and not ip.ip.startswith(("127.", "169.254."))
+    ]
+    # Home and office LANs use private ranges; overlay VPNs such as
+    # Tailscale (100.64.0.0/10) and public addresses rank after them
+    return sorted(ips, key=lambda ip: not ipaddress.ip_address(ip).is_private)
+
+
+def _route_ip() -> str:
+    """
+    Find the address of the interface that routes to the internet.
+    
+    Returns:
+        The local IP address, or 127.0.0.1 if there is no route.
     """
     try:
         # Create a socket connection to determine the local IP
@@ -26,6 +77,21 @@ def get_local_ip() -> str:
         return "127.0.0.1"
 
 
+@lru_cache(maxsize=1)
+def get_local_ip() -> str:
+    """
+    Auto-detect the local IP address for QR codes and BLE advertising.
+    
+    Uses the adapter table when ifaddr is installed, and only falls back
+    to a UDP routing lookup when it finds no LAN adapter.
+    
+    Returns:
+        The local IP address as a string.
+    """
+    candidates = _adapter_ips()
+    return candidates[0] if candidates else _route_ip()
+
+
 def get_server_url(port: int = 8000) -> str:
     """
     Get the full server URL.
@@ -1,109 +1,78 @@
 """QR code generation utilities for Flashare."""
 
+import copy
 import io
+from functools import lru_cache
 from typing import Optional
 
 import qrcode
 from qrcode.constants import ERROR_CORRECT_M
+from qrcode.image.svg import SvgImage
 
 from flashare.core.network import get_server_url
 
 
-def generate_qr_ascii(url: Optional[str] = None, port: int = 8000) -> str:
+# Fixed mask pattern (0-7). python-qrcode otherwise renders all eight masks
+# and scores each to pick the "best" one, which costs roughly three times
+# the encode itself; any mask scans fine for a short URL on a screen
+QR_MASK_PATTERN = 0
+
+
+def generate_qr_ascii(
+    url: Optional[str] = None,
+    port: int = 8000,
+    mask_pattern: Optional[int] = QR_MASK_PATTERN,
+) -> str:
     """
     Generate an ASCII art QR code for terminal display.
     
     Args:
         url: The URL to encode. If None, uses the auto-detected server URL.
         port: Server port (used if url is None).
+        mask_pattern: QR mask pattern, or None to search for the best one.
         
     Returns:
         ASCII art representation of the QR code.
     """
-    url = url or get_server_url(port)
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=ERROR_CORRECT_M,
-        box_size=1,
-        border=2,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-    
-    # Generate ASCII representation
-    modules = qr.get_matrix()
-    
-    lines = []
-    for row in modules:
-        line = ""
-        for cell in row:
-            # Use block characters for better visibility
-            line += "██" if cell else "  "
-        lines.append(line)
-    
-    return "\n".join(lines)
+    return _qr_ascii(url or get_server_url(port), mask_pattern)
 
 
-def generate_qr_svg(url: Optional[str] = None, port: int = 8000) -> str:
+def generate_qr_svg(
+    url: Optional[str] = None,
+    port: int = 8000,
+    mask_pattern: Optional[int] = QR_MASK_PATTERN,
+) -> str:
     """
     Generate an SVG QR code for web display.
     
     Args:
         url: The URL to encode. If None, uses the auto-detected server URL.
         port: Server port (used if url is None).
+        mask_pattern: QR mask pattern, or None to search for the best one.
         
     Returns:
         SVG string of the QR code.
     """
-    url = url or get_server_url(port)
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=ERROR_CORRECT_M,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-    
-    # Create SVG image
-    from qrcode.image.svg import SvgImage
-    img = qr.make_image(image_factory=SvgImage)
-    
-    # Convert to string
-    buffer = io.BytesIO()
-    img.save(buffer)
-    return buffer.getvalue().decode('utf-8')
+    return _qr_svg(url or get_server_url(port), mask_pattern)
 
 
-def generate_qr_png_bytes(url: Optional[str] = None, port: int = 8000) -> bytes:
+def generate_qr_png_bytes(
+    url: Optional[str] = None,
+    port: int = 8000,
+    mask_pattern: Optional[int] = QR_MASK_PATTERN,
+) -> bytes:
     """
     Generate a PNG QR code as bytes.
     
     Args:
         url: The URL to encode. If None, uses the auto-detected server URL.
         port: Server port (used if url is None).
+        mask_pattern: QR mask pattern, or None to search for the best one.
         
     Returns:
         PNG image bytes.
     """
-    url = url or get_server_url(port)
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=ERROR_CORRECT_M,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    return buffer.getvalue()
+    return _qr_png(url or get_server_url(port), mask_pattern)
 
 
 def get_qr_data(port: int = 8000) -> dict:
@@ -123,3 +92,74 @@ def get_qr_data(port: int = 8000) -> dict:
         "ascii": generate_qr_ascii(url),
         "svg": generate_qr_svg(url),
     }
+
+
+# ==================== Cached Renderers ====================
+# The encoded URL only changes with the local IP or port, so the QR code is
+# encoded once per URL and every rendering is built once from it
+
+# Use block characters for better visibility
+_ASCII_CELLS = {False: "  ", True: "██"}
+
+
+@lru_cache(maxsize=8)
+def _build_qr(url: str, mask_pattern: Optional[int]) -> qrcode.QRCode:
+    """
+    Encode a URL into a QR code shared by all renderings.
+    
+    The result is treated as read-only; renderers take a sized copy.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECT_M,
+        mask_pattern=mask_pattern,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+def _sized_qr(url: str, mask_pattern: Optional[int], box_size: int, border: int) -> qrcode.QRCode:
+    """Shallow copy of the shared QR code with its own box size and border."""
+    qr = copy.copy(_build_qr(url, mask_pattern))
+    qr.box_size = box_size
+    qr.border = border
+    return qr
+
+
+@lru_cache(maxsize=8)
+def _qr_ascii(url: str, mask_pattern: Optional[int]) -> str:
+    """Render the ASCII QR code for a URL."""
+    qr = _sized_qr(url, mask_pattern, box_size=1, border=2)
+    
+    # Generate ASCII representation; each row is mapped cell-to-string in C
+    # rather than concatenated one cell at a time
+    cell = _ASCII_CELLS.__getitem__
+    return "\n".join("".join(map(cell, row)) for row in qr.get_matrix())
+
+
+@lru_cache(maxsize=8)
+def _qr_svg(url: str, mask_pattern: Optional[int]) -> str:
+    """Render the SVG QR code for a URL."""
+    qr = _sized_qr(url, mask_pattern, box_size=10, border=4)
+    
+    # Create SVG image
+    img = qr.make_image(image_factory=SvgImage)
+    
+    # Convert to string
+    buffer = io.BytesIO()
+    img.save(buffer)
+    return buffer.getvalue().decode('utf-8')
+
+
+@lru_cache(maxsize=8)
+def _qr_png(url: str, mask_pattern: Optional[int]) -> bytes:
+    """Render the PNG QR code for a URL."""
+    # 6px modules still scan easily and shrink the bitmap zlib has to deflate
+    qr = _sized_qr(url, mask_pattern, box_size=6, border=4)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
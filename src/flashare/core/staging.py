@@ -0,0 +1,105 @@
+"""File staging utilities for Flashare."""
+
+import errno
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from flashare.config import config
+
+
+# ioctl request number for FICLONE (copy-on-write clone) on Linux
+FICLONE = 0x40049409
+
+
+def _clone_file(src: Path, dst: Path) -> bool:
+    """
+    Create dst as a copy-on-write clone of src.
+
+    Supported on btrfs/XFS (Linux FICLONE) and APFS (macOS `cp -c`).
+
+    Args:
+        src: Source file.
+        dst: Destination path. Must not exist.
+
+    Returns:
+        True if the clone was created.
+
+    Raises:
+        FileExistsError: If dst already exists.
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(src, 'rb') as f_in, open(dst, 'xb') as f_out:
+                try:
+                    fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+                except OSError:
+                    f_out.close()
+                    dst.unlink()
+                    return False
+        except FileExistsError:
+            raise
+        except OSError:
+            return False
+
+        shutil.copystat(src, dst)
+        return True
+
+    if sys.platform == "darwin":
+        # cp would overwrite an existing file
+        if dst.exists():
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+        result = subprocess.run(
+            ["cp", "-c", str(src), str(dst)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+    return False
+
+
+def stage_file(src: Path, dst: Path) -> Path:
+    """
+    Place a file at dst as cheaply as the filesystem allows.
+
+    Tries a copy-on-write clone first, and only falls back to a full copy
+    when that is not possible (e.g. ext4, or across filesystems).
+
+    Hard links are cheaper still but are opt-in through
+    config.stage_hardlinks: the staged file then shares an inode with the
+    original, so edits to the original show up mid-download (and no longer
+    match the Content-Length), and anything writing to the staged path,
+    such as a later `ffmpeg -y` optimization, rewrites the original.
+
+    Args:
+        src: File to stage.
+        dst: Destination path. Must not exist.
+
+    Returns:
+        The destination path.
+
+    Raises:
+        FileExistsError: If dst already exists; it is never overwritten.
+    """
+    if _clone_file(src, dst):
+        return dst
+
+    if config.stage_hardlinks:
+        try:
+            os.link(src, dst)
+            return dst
+        except FileExistsError:
+            raise
+        except OSError:
+            pass
+
+    with open(src, 'rb') as f_in, open(dst, 'xb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    shutil.copystat(src, dst)
+
+    return dst
@@ -1,6 +1,8 @@
 """Main FastAPI server for Flashare."""
 
+import os
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -12,15 +14,65 @@ from fastapi.middleware.cors import CORSMiddleware
 from flashare import __version__, __app_name__
 from flashare.config import config
 from flashare.api.routes import router as api_router
+from flashare.core.compression import train_dictionary
+from flashare.core.qr import generate_qr_png_bytes, get_qr_data
+
+
+# Root response when the packaged mobile UI is missing
+_UI_NOT_FOUND = {
+    "app": __app_name__,
+    "version": __version__,
+    "message": "Welcome to Flashare! Mobile UI not found.",
+    "api_docs": "/docs",
+}
+
+
+def _run_in_background(func, *args):
+    """
+    Start a blocking startup task in the default executor.
+    
+    These tasks only warm caches, so a failure is reported and the
+    server carries on without the cached result.
+    
+    Args:
+        func: Function to run.
+        *args: Arguments passed to func.
+    """
+    def report(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️  Background task {func.__name__} failed: {future.exception()!r}")
+    
+    asyncio.get_running_loop().run_in_executor(None, func, *args).add_done_callback(report)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan handler.
     """
-    # Startup
+    # Startup: size the default executor used by run_in_executor
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) + 4),
+            thread_name_prefix="flashare-io",
+        )
+    )
+    
     print(f"🚀 Starting {__app_name__} v{__version__}")
     print(f"📁 Uploads directory: {config.uploads_dir}")
     
+    # Request handlers assume the directory exists rather than checking each time
+    config.ensure_uploads_dir()
+    
+    # Train the small-file zstd dictionary from this session's uploads;
+    # if training fails, downloads go out without a dictionary
+    _run_in_background(train_dictionary)
+    
+    # Build the QR renderings in the background so the first /api/qr and
+    # /api/qr.png requests are served from cache
+    _run_in_background(get_qr_data, config.port)
+    _run_in_background(generate_qr_png_bytes, None, config.port)
+    
     yield
     
     # Shutdown
@@ -58,19 +110,17 @@ def create_app() -> FastAPI:
     if static_dir.exists():
         app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
     
-    # Root route serves the mobile UI
+    # Root route serves the mobile UI; the UI ships with the package, so
+    # whether it exists is resolved once here rather than on every hit
+    index_path = static_dir / "index.html"
+    index_exists = index_path.exists()
+    
     @app.get("/")
     async def serve_ui():
         """Serve the main mobile UI."""
-        index_path = static_dir / "index.html"
-        if index_path.exists():
+        if index_exists:
             return FileResponse(index_path)
-        return {
-            "app": __app_name__,
-            "version": __version__,
-            "message": "Welcome to Flashare! Mobile UI not found.",
-            "api_docs": "/docs",
-        }
+        return _UI_NOT_FOUND
     
     return app
 